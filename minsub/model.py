@@ -1,9 +1,13 @@
 """Store constants and models for minsub."""
 
 import collections
+import dataclasses
+import itertools
+from typing import List, Optional, Union
 
 DATA_DISK_NAME = 'minsubdisk'
 DATA_DISK_MOUNT = '/mnt/data'
+DATA_DISK_MOUNT_PREFIX = DATA_DISK_MOUNT + '/'
 
 # Interval strings for timeout.
 ONE_HOUR = '3600s'
@@ -16,15 +20,8 @@ DEFAULT_SCOPE = 'https://www.googleapis.com/auth/cloud-platform'
 DEFAULT_MACHINE_TYPE = 'n1-standard-2'
 
 
-class ResourcesConfig(
-    collections.namedtuple('ResourcesConfig', [
-        'project',
-        'region',
-        'machine_type',
-        'disk_size',
-        'service_account',
-        'scopes',
-    ])):
+@dataclasses.dataclass(frozen=True, slots=True)
+class ResourcesConfig(object):
   """File parameter to be automatically localized or de-localized.
 
   Input files are automatically localized to the pipeline VM's local disk.
@@ -44,42 +41,40 @@ class ResourcesConfig(
     scopes (str|list<str>): (optional) the scopes to use for the launched job,
         defaults to https://www.googleapis.com/auth/cloud-platform,
   """
-  __slots__ = ()
+  project: str
+  region: str
+  machine_type: str = DEFAULT_MACHINE_TYPE
+  disk_size: int = DEFAULT_DISK_SIZE
+  service_account: Optional[str] = None
+  scopes: Union[str, List[str]] = DEFAULT_SCOPE
 
-  def __new__(cls,
-              project,
-              region,
-              machine_type=DEFAULT_MACHINE_TYPE,
-              disk_size=DEFAULT_DISK_SIZE,
-              service_account=None,
-              scopes=DEFAULT_SCOPE):
-    if isinstance(scopes, str):
-      scopes = [scopes]
-    return super(ResourcesConfig, cls).__new__(
-        cls, project, region, machine_type, disk_size, service_account, scopes)
+  def __post_init__(self):
+    if isinstance(self.scopes, str):
+      # The dataclass is frozen, so normalize through object.__setattr__.
+      object.__setattr__(self, 'scopes', [self.scopes])
 
 
 class JobParams(object):
-  """Container for job parameters."""
+  """Container for job parameters.
+
+  Each argument is a dict of parameters keyed by parameter name; the
+  attributes expose the parameters themselves.
+  """
+  __slots__ = ('envs', 'inputs', 'recursive_inputs', 'outputs',
+               'recursive_outputs')
 
   def __init__(self, envs, inputs, r_inputs, outputs, r_outputs):
     self._check_for_collisions([envs, inputs, r_inputs, outputs, r_outputs])
-    self.envs = envs
-    self.inputs = inputs
-    self.recursive_inputs = r_inputs
-    self.outputs = outputs
-    self.recursive_outputs = r_outputs
+    self.envs = envs.values()
+    self.inputs = inputs.values()
+    self.recursive_inputs = r_inputs.values()
+    self.outputs = outputs.values()
+    self.recursive_outputs = r_outputs.values()
 
   def _check_for_collisions(self, allinputs):
-    """Takes a list of iterable containers."""
-    known_names = set()
-    duplicates = []
-    for vset in allinputs:
-      for v in vset:
-        if v.name not in known_names:
-          known_names.add(v.name)
-        else:
-          duplicates.append(v.name)
+    """Takes a list of dicts keyed by parameter name."""
+    names = collections.Counter(itertools.chain.from_iterable(allinputs))
+    duplicates = [name for name, count in names.items() if count > 1]
     if duplicates:
       raise ValueError('Bad job config; duplicate names found: %r' % duplicates)
 
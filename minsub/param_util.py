@@ -16,9 +16,11 @@
 from __future__ import absolute_import
 from __future__ import print_function
 
-import collections
+import dataclasses
+import functools
 import os
 import re
+from typing import Optional
 
 import model
 
@@ -29,11 +31,16 @@ AUTO_PREFIX_OUTPUT = 'OUTPUT_'  # Prefix for auto-generated output names
 DEFAULT_INPUT_LOCAL_PATH = 'input'
 DEFAULT_OUTPUT_LOCAL_PATH = 'output'
 
+# Home directory used to expand local '~/' paths, read once at import.
+_HOME = os.getenv('HOME') or ''
 
-class FileParam(
-    collections.namedtuple('FileParam', [
-        'name', 'value', 'docker_path', 'uri', 'recursive',
-    ])):
+# Characters rejected anywhere in a URI, and wildcards in the directory part.
+_FORBIDDEN = re.compile(r'[\[\]?]')
+_DIR_WILDCARD = re.compile(r'\*')
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class FileParam(object):
   """File parameter to be automatically localized or de-localized.
 
   Input files are automatically localized to the pipeline VM's local disk.
@@ -50,39 +57,27 @@ class FileParam(
     uri (UriParts): A uri or local file path.
     recursive (bool): Whether recursive copy is wanted.
   """
-  __slots__ = ()
-
-  def __new__(cls, name, value, docker_path, uri, recursive):
-    return super(FileParam, cls).__new__(cls, name, value, docker_path, uri,
-                                         recursive)
+  name: str
+  value: Optional[str] = None
+  docker_path: Optional[str] = None
+  uri: Optional['UriParts'] = None
+  recursive: bool = False
 
 
+@dataclasses.dataclass(frozen=True, slots=True)
 class InputFileParam(FileParam):
   """Simple typed-derivative of a FileParam."""
 
-  def __new__(cls,
-              name,
-              value=None,
-              docker_path=None,
-              uri=None,
-              recursive=False):
-    _validate_param_name(name, 'Input parameter')
-    return super(InputFileParam, cls).__new__(
-        cls, name, value, docker_path, uri, recursive)
+  def __post_init__(self):
+    _validate_param_name(self.name, 'Input parameter')
 
 
+@dataclasses.dataclass(frozen=True, slots=True)
 class OutputFileParam(FileParam):
   """Simple typed-derivative of a FileParam."""
 
-  def __new__(cls,
-              name,
-              value=None,
-              docker_path=None,
-              uri=None,
-              recursive=False):
-    _validate_param_name(name, 'Output parameter')
-    return super(OutputFileParam, cls).__new__(
-        cls, name, value, docker_path, uri, recursive)
+  def __post_init__(self):
+    _validate_param_name(self.name, 'Output parameter')
 
 
 class UriParts(str):
@@ -118,18 +113,30 @@ class UriParts(str):
     return newuri
 
 
-class EnvParam(collections.namedtuple('EnvParam', ['name', 'value'])):
+@functools.lru_cache(maxsize=4096)
+def _intern_uri_parts(path, basename):
+  """Return a shared UriParts for a path and basename.
+
+  Parameters that reference the same URI share one UriParts instance; like
+  the other rewrite caches, the cache is bounded and can be reset with
+  _intern_uri_parts.cache_clear().
+  """
+  return UriParts(path, basename)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class EnvParam(object):
   """Name/value input parameter to a pipeline.
 
   Attributes:
     name (str): the input parameter and environment variable name.
     value (str): the variable value (optional).
   """
-  __slots__ = ()
+  name: str
+  value: Optional[str] = None
 
-  def __new__(cls, name, value=None):
-    _validate_param_name(name, 'Environment variable')
-    return super(EnvParam, cls).__new__(cls, name, value)
+  def __post_init__(self):
+    _validate_param_name(self.name, 'Environment variable')
 
 
 class FileParamUtil(object):
@@ -143,6 +150,7 @@ class FileParamUtil(object):
   specified (get_variable_name()) as well as common path validation for
   input and output arguments (validate_paths).
   """
+  __slots__ = ('param_class', '_auto_prefix', '_auto_index', '_relative_path')
 
   def __init__(self, auto_prefix, relative_path):
     self.param_class = FileParam
@@ -153,7 +161,7 @@ class FileParamUtil(object):
   def get_variable_name(self, name):
     """Produce a default variable name if none is specified."""
     if not name:
-      name = '%s%s' % (self._auto_prefix, self._auto_index)
+      name = f'{self._auto_prefix}{self._auto_index}'
       self._auto_index += 1
     return name
 
@@ -166,25 +174,24 @@ class FileParamUtil(object):
       raise ValueError('Expected GCS location found: %s' % uri)
 
   @staticmethod
-  def _validate_paths_or_fail(uri, recursive):
-    """Do basic validation of the uri, return the path and filename."""
-    path, filename = os.path.split(uri)
-
+  def _validate_paths_or_fail(uri, path, filename, recursive):
+    """Do basic validation of the uri, already split into path and filename."""
     # minsub could support character ranges ([0-9]) with some more work, but for
     # now we assume that basic asterisk wildcards are sufficient. Reject any URI
     # that includes square brackets or question marks, since we know that
     # if they actually worked, it would be accidental.
-    if '[' in uri or ']' in uri:
+    m = _FORBIDDEN.search(uri)
+    if m:
+      if m.group() == '?':
+        raise ValueError('Question mark wildcards are not supported: %s' % uri)
       raise ValueError(
           'Square bracket (character ranges) are not supported: %s' % uri)
-    if '?' in uri:
-      raise ValueError('Question mark wildcards are not supported: %s' % uri)
 
     # Only support file URIs and *filename* wildcards
     # Wildcards at the directory level or "**" syntax would require better
     # support from the Pipelines API *or* doing expansion here and
     # (potentially) producing a series of FileParams, instead of one.
-    if '*' in path:
+    if _DIR_WILDCARD.search(path):
       raise ValueError(
           'Path wildcard (*) are only supported for files: %s' % uri)
     if '**' in filename:
@@ -205,11 +212,13 @@ class FileParamUtil(object):
       raw_uri = directory_fmt(raw_uri)
     # Validate the file provider & raw URI, then rewrite the path
     # component of the URI for docker and remote.
+    # The GCS rewriter leaves the URI unchanged, so the raw URI is split once
+    # and reused for both validation and the UriParts.
     self._validate_file_provider(raw_uri)
-    self._validate_paths_or_fail(raw_uri, recursive)
-    uri, docker_uri = _gcs_uri_rewriter(raw_uri)
-    uri_parts = UriParts(
-        directory_fmt(os.path.dirname(uri)), os.path.basename(uri))
+    path, _, filename = raw_uri.rpartition('/')
+    self._validate_paths_or_fail(raw_uri, path, filename, recursive)
+    _, docker_uri = _gcs_uri_rewriter(raw_uri)
+    uri_parts = _intern_uri_parts(directory_fmt(path), filename)
     return docker_uri, uri_parts
 
   def make_param(self, name, raw_uri, recursive):
@@ -222,6 +231,7 @@ class FileParamUtil(object):
 
 class InputFileParamUtil(FileParamUtil):
   """Implementation of FileParamUtil for input files."""
+  __slots__ = ()
 
   def __init__(self, docker_path):
     super(InputFileParamUtil, self).__init__(AUTO_PREFIX_INPUT, docker_path)
@@ -230,12 +240,14 @@ class InputFileParamUtil(FileParamUtil):
 
 class OutputFileParamUtil(FileParamUtil):
   """Implementation of FileParamUtil for output files."""
+  __slots__ = ()
 
   def __init__(self, docker_path):
     super(OutputFileParamUtil, self).__init__(AUTO_PREFIX_OUTPUT, docker_path)
     self.param_class = OutputFileParam
 
 
+@functools.lru_cache(maxsize=4096)
 def _gcs_uri_rewriter(raw_uri):
   """Rewrite GCS file path to a docker mount.
 
@@ -243,6 +255,9 @@ def _gcs_uri_rewriter(raw_uri):
   it as the normalized URI. The docker path has the gs:// prefix replaced
   with gs/ so that it can be mounted inside a docker image.
 
+  Results are memoized since the same URIs and prefixes tend to recur across
+  the parameters of a job; the number of URIs per job is bounded.
+
   Args:
     raw_uri: (str) the raw GCS URI, prefix, or pattern.
 
@@ -290,13 +305,16 @@ def _local_uri_rewriter(raw_uri):
   # Generate the local path that can be resolved by filesystem operations,
   # this removes special shell characters, condenses indirects and replaces
   # any unnecessary prefix.
-  prefix_replacements = [('file:///', '/'), ('~/', os.getenv('HOME')), ('./',
-                                                                        ''),
-                         ('file:/', '/')]
+  # Prefixes are checked from most to least common; at most one applies.
   normed_path = raw_path
-  for prefix, replacement in prefix_replacements:
-    if normed_path.startswith(prefix):
-      normed_path = os.path.join(replacement, normed_path[len(prefix):])
+  if normed_path.startswith('./'):
+    normed_path = normed_path[2:]
+  elif normed_path.startswith('~/'):
+    normed_path = os.path.join(_HOME, normed_path[2:])
+  elif normed_path.startswith('file:///'):
+    normed_path = os.path.join('/', normed_path[8:])
+  elif normed_path.startswith('file:/'):
+    normed_path = os.path.join('/', normed_path[6:])
   # Because abspath strips the trailing '/' from bare directory references
   # other than root, this ensures that all directory references end with '/'.
   normed_uri = directory_fmt(os.path.abspath(normed_path))
@@ -307,11 +325,13 @@ def _local_uri_rewriter(raw_uri):
   #  2) Rewrite required indirects as synthetic characters.
   #  3) Strip relative or absolute path leading character.
   #  4) Add 'file/' prefix.
-  docker_rewrites = [(r'/\.\.', '/_dotdot_'), (r'^\.\.', '_dotdot_'),
-                     (r'^~/', '_home_/'), (r'^file:/', '')]
-  docker_path = os.path.normpath(raw_path)
-  for pattern, replacement in docker_rewrites:
-    docker_path = re.sub(pattern, replacement, docker_path)
+  docker_path = os.path.normpath(raw_path).replace('/..', '/_dotdot_')
+  if docker_path.startswith('..'):
+    docker_path = '_dotdot_' + docker_path[2:]
+  elif docker_path.startswith('~/'):
+    docker_path = '_home_/' + docker_path[2:]
+  elif docker_path.startswith('file:/'):
+    docker_path = docker_path[6:]
   docker_path = docker_path.lstrip('./')  # Strips any of '.' './' '/'.
   docker_path = directory_fmt('file/' + docker_path) + filename
   return normed_uri, docker_path
@@ -332,17 +352,12 @@ def split_pair(pair_string, separator, nullable_idx=1):
   Raises:
     IndexError: If nullable_idx is not 0 or 1.
   """
-
-  pair = pair_string.split(separator, 1)
-  if len(pair) == 1:
-    if nullable_idx == 0:
-      return [None, pair[0]]
-    elif nullable_idx == 1:
-      return [pair[0], None]
-    else:
-      raise IndexError('nullable_idx should be either 0 or 1.')
-  else:
-    return pair
+  if nullable_idx not in (0, 1):
+    raise IndexError('nullable_idx should be either 0 or 1.')
+  head, sep, tail = pair_string.partition(separator)
+  if not sep:
+    return [None, head] if nullable_idx == 0 else [head, None]
+  return [head, tail]
 
 
 def parse_pair_args(labels, argclass):
@@ -357,15 +372,37 @@ def parse_pair_args(labels, argclass):
     argclass: Container class for args, must instantiate with argclass(k, v).
 
   Returns:
-    list of argclass objects.
+    dict of argclass objects keyed by name.
+
+  Raises:
+    ValueError: If a name is given more than once.
   """
-  label_data = set()
+  label_data = {}
   for arg in labels:
     name, value = split_pair(arg, '=', nullable_idx=1)
-    label_data.add(argclass(name, value))
+    _add_unique_param(label_data, argclass(name, value))
   return label_data
 
 
+def _add_unique_param(sink, param):
+  """Add a param to a dict keyed by name, failing on duplicate names."""
+  if param.name in sink:
+    raise ValueError(
+        'Bad job config; duplicate names found: %r' % [param.name])
+  sink[param.name] = param
+
+
+def _parse_file_args(file_param_util, args, recursive):
+  """Parse file arguments into a dict of FileParams keyed by name."""
+  file_data = {}
+  for arg in args:
+    name, value = split_pair(arg, '=', nullable_idx=0)
+    name = file_param_util.get_variable_name(name)
+    _add_unique_param(
+        file_data, file_param_util.make_param(name, value, recursive=recursive))
+  return file_data
+
+
 def args_to_job_params(envs, inputs, inputs_recur, outputs, outputs_recur):
   """Parse env, input, and output parameters into a job parameters and data.
 
@@ -396,27 +433,14 @@ def args_to_job_params(envs, inputs, inputs_recur, outputs, outputs_recur):
   # Parse environmental variables and labels.
   env_data = parse_pair_args(envs, EnvParam)
 
-  # For input files, we need to:
+  # For input and output files, _parse_file_args will:
   #   * split the input into name=uri pairs (name optional)
   #   * get the environmental variable name, or automatically set if null.
-  #   * create the input file param
-  input_data, r_input_data = set(), set()
-  for (r, sink, args) in ((False, input_data, inputs), (True, r_input_data, inputs_recur)):  # pylint: disable=line-too-long
-    for arg in args:
-      name, value = split_pair(arg, '=', nullable_idx=0)
-      name = input_file_param_util.get_variable_name(name)
-      sink.add(input_file_param_util.make_param(name, value, recursive=r))
-
-  # For output files, we need to:
-  #   * split the input into name=uri pairs (name optional)
-  #   * get the environmental variable name, or automatically set if null.
-  #   * create the output file param
-  output_data, r_output_data = set(), set()
-  for (r, sink, args) in ((False, output_data, outputs), (True, r_output_data, outputs_recur)):  # pylint: disable=line-too-long
-    for arg in args:
-      name, value = split_pair(arg, '=', 0)
-      name = output_file_param_util.get_variable_name(name)
-      sink.add(output_file_param_util.make_param(name, value, recursive=r))
+  #   * create the file param
+  input_data = _parse_file_args(input_file_param_util, inputs, False)
+  r_input_data = _parse_file_args(input_file_param_util, inputs_recur, True)
+  output_data = _parse_file_args(output_file_param_util, outputs, False)
+  r_output_data = _parse_file_args(output_file_param_util, outputs_recur, True)
 
   return model.JobParams(
       env_data,
@@ -427,6 +451,7 @@ def args_to_job_params(envs, inputs, inputs_recur, outputs, outputs_recur):
   )
 
 
+@functools.lru_cache(maxsize=4096)
 def directory_fmt(directory):
   """In ensure that directories end with '/'; fixes recursive copy."""
   return directory.rstrip('/') + '/'
@@ -439,6 +464,8 @@ def _validate_param_name(name, param_type):
   # 3.235 Name
   # In the shell command language, a word consisting solely of underscores,
   # digits, and alphabetics from the portable character set.
-  if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', name):
+  #
+  # Restricted to ASCII, str.isidentifier() accepts exactly these names.
+  if not (name.isascii() and name.isidentifier()):
     raise ValueError('Invalid %s: %s' % (param_type, name))
 
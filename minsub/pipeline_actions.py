@@ -4,6 +4,7 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
 import json
 import os
 import textwrap
@@ -25,8 +26,58 @@ GENERIC_BASH_SCRIPT_CMD = textwrap.dedent("""\
 """)
 
 
+def _make_batch_copy_commands(copies, make_dirs=False):
+  """Create one gsutil copy command per destination directory.
+
+  Each gsutil invocation pays a startup and authentication cost, so file
+  copies that share a destination directory are combined into a single
+  command. The order of first appearance of each directory is preserved.
+
+  gsutil only copies multiple sources into an existing local directory, so
+  local destination directories must be created first with make_dirs.
+
+  >>> for cmd in _make_batch_copy_commands([
+  ...     ('gs://b/d/x.txt', '/mnt/data/gs/b/d/x.txt'),
+  ...     ('gs://b/e/y.txt', '/mnt/data/gs/b/e/y.txt'),
+  ...     ('gs://b/d/z*.txt', '/mnt/data/gs/b/d/z*.txt'),
+  ... ], make_dirs=True):
+  ...   print(cmd)
+  mkdir -p "/mnt/data/gs/b/d"
+  gsutil -mq cp -I "/mnt/data/gs/b/d/" <<'EOF'
+  gs://b/d/x.txt
+  gs://b/d/z*.txt
+  EOF
+  mkdir -p "/mnt/data/gs/b/e"
+  gsutil -mq cp -I "/mnt/data/gs/b/e/" <<'EOF'
+  gs://b/e/y.txt
+  EOF
+
+  Args:
+    copies: iterable of (src, dst) pairs, where dst is a file path or URI.
+    make_dirs: (bool) create each destination directory before copying; only
+               valid for local destinations.
+
+  Returns:
+    list of bash command strings.
+  """
+  groups = collections.OrderedDict()
+  for src, dst in copies:
+    groups.setdefault(os.path.dirname(dst), []).append(src)
+  # Sources are fed to `gsutil cp -I` through a quoted heredoc so that no
+  # shell expansion is applied to the URIs.
+  commands = []
+  for dst_dir, srcs in groups.items():
+    if make_dirs:
+      commands.append(f'mkdir -p "{dst_dir}"')
+    src_lines = '\n'.join(srcs)
+    commands.append(f'gsutil -mq cp -I "{dst_dir}/" <<\'EOF\'\n{src_lines}\nEOF')
+  return commands
+
+
 class GenericAction(object):
   """Base class for the definition of actions."""
+  __slots__ = ('mount_point', 'mount_disk_name', 'config', 'name', 'image',
+               'entrypoint_override', 'timeout', 'envs', 'flags', '_as_dict')
 
   def __init__(self, job_config):
     self.mount_point = model.DATA_DISK_MOUNT
@@ -38,15 +89,34 @@ class GenericAction(object):
     self.timeout = model.ONE_DAY
     self.envs = {}
     self.flags = []
+    self._as_dict = None
 
   def make_envs(self):
-    """Set environmental variables, optionally override this."""
-    envs = self.envs.copy()
-    return envs
+    """Set environmental variables, optionally override this.
+
+    The returned dict is not copied; overrides that add computed variables
+    should build and return a new dict.
+    """
+    return self.envs
 
   def make_commands(self):
     raise NotImplementedError('Derived class must implement this')
 
+  def is_empty(self):
+    """Return True if the action has no work and can be left out."""
+    return False
+
+  @property
+  def as_dict(self):
+    """The action request parameter for this action.
+
+    The dict is built on first access and cached; changing the action's
+    attributes after that is not supported and will not be reflected.
+    """
+    if self._as_dict is None:
+      self._as_dict = self.to_dict()
+    return self._as_dict
+
   def to_dict(self):
     """Convert the generic action into an action request parameter."""
     envs = self.make_envs()
@@ -71,59 +141,74 @@ class GenericAction(object):
     return d
 
   def to_json(self, pretty=False):
-    """Convert to a json string."""
+    """Convert to a json string.
+
+    To serialize a whole request, use
+    pipeline_api.create_pipeline_request_json() instead of calling this for
+    each action.
+    """
     if pretty:
-      return json.dumps(self.to_dict(), indent=4, sort_keys=True)
+      return json.dumps(self.as_dict, indent=4, sort_keys=True)
     else:
-      return json.dumps(self.to_dict())
+      return json.dumps(self.as_dict)
 
 
 class LocalizeAction(GenericAction):
   """Localize files from GCS."""
+  __slots__ = ()
 
   def __init__(self, jconfig):
     super(LocalizeAction, self).__init__(jconfig)
     self.name = 'localize'
     self.image = CLOUD_SDK_IMAGE
 
+  def is_empty(self):
+    """Return True if there are no inputs to copy."""
+    return not (self.config.inputs or self.config.recursive_inputs)
+
   def make_commands(self):
     """Create the localize command from the job config."""
-    copy_commands = []
-    for ninput in self.config.inputs:
-      dst = os.path.join(self.mount_point, ninput.docker_path)
-      src = ninput.value
-      copy_commands.append('gsutil -mq cp "%s" "%s"' % (src, dst))
+    prefix = self.mount_point + '/'
+    copy_commands = _make_batch_copy_commands(
+        ((ninput.value, prefix + ninput.docker_path)
+         for ninput in self.config.inputs),
+        make_dirs=True)
     for rinput in self.config.recursive_inputs:
-      dst = os.path.join(self.mount_point, rinput.docker_path)
+      dst = prefix + rinput.docker_path
       src = rinput.value
-      copy_commands.append('gsutil -mq rsync -r "%s" "%s"' % (src, dst))
+      copy_commands.append(f'gsutil -mq rsync -r "{src}" "{dst}"')
     return ['-c', GENERIC_BASH_SCRIPT_CMD % '\n'.join(copy_commands)]
 
 
 class DelocalizeAction(GenericAction):
   """Delocalize files to GCS."""
+  __slots__ = ()
 
   def __init__(self, jconfig):
     super(DelocalizeAction, self).__init__(jconfig)
     self.name = 'delocalize'
     self.image = CLOUD_SDK_IMAGE
 
+  def is_empty(self):
+    """Return True if there are no outputs to copy."""
+    return not (self.config.outputs or self.config.recursive_outputs)
+
   def make_commands(self):
     """Create the localize command from the job config."""
-    copy_commands = []
-    for nout in self.config.outputs:
-      src = os.path.join(self.mount_point, nout.docker_path)
-      dst = nout.value
-      copy_commands.append('gsutil -mq cp "%s" "%s"' % (src, dst))
+    prefix = self.mount_point + '/'
+    copy_commands = _make_batch_copy_commands(
+        (prefix + nout.docker_path, nout.value)
+        for nout in self.config.outputs)
     for rout in self.config.recursive_outputs:
-      src = os.path.join(self.mount_point, rout.docker_path)
+      src = prefix + rout.docker_path
       dst = rout.value
-      copy_commands.append('gsutil -mq rsync -r "%s" "%s"' % (src, dst))
+      copy_commands.append(f'gsutil -mq rsync -r "{src}" "{dst}"')
     return ['-c', GENERIC_BASH_SCRIPT_CMD % '\n'.join(copy_commands)]
 
 
 class UserAction(GenericAction):
   """Localize files from GCS."""
+  __slots__ = ('command',)
 
   def __init__(self, jconfig, action_name, docker_image, command):
     super(UserAction, self).__init__(jconfig)
@@ -4,34 +4,144 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-import os
+import itertools
+import json
+import re
 
 import model
+import param_util
+
+LABELS = {
+    'minsub': 'v1',
+}
+
+# Stand-ins for the streamed parts of a request in write_pipeline_request();
+# the NUL characters make a clash with a real request value practically
+# impossible.
+_ACTIONS_PLACEHOLDER = '\x00actions\x00'
+_ENVS_PLACEHOLDER = '\x00environment\x00'
+_ENCODED_ACTIONS_PLACEHOLDER = json.dumps(_ACTIONS_PLACEHOLDER)
+_ENCODED_ENVS_PLACEHOLDER = json.dumps(_ENVS_PLACEHOLDER)
+_PLACEHOLDER_RE = re.compile('(%s|%s)' % (
+    re.escape(_ENCODED_ACTIONS_PLACEHOLDER),
+    re.escape(_ENCODED_ENVS_PLACEHOLDER)))
 
 
 def create_pipeline_request(
     resources_config, job_config, actions, timeout=model.SEVEN_DAYS):
-  """Create a pipelines API request."""
-  envs = {}
-  for vset in job_config.values():
-    for v in vset:
-      if hasattr(v, 'docker_path'):
-        envs[v.name] = os.path.join(model.DATA_DISK_MOUNT, v.docker_path)
-      else:
-        envs[v.name] = v.value
+  """Create a pipelines API request.
+
+  Actions with no work to do, such as localizing a job without inputs, are
+  left out since each action still costs a container start on the VM.
+  """
+  return _create_request(
+      resources_config,
+      [a.as_dict for a in _iter_active_actions(actions)],
+      dict(_iter_envs(job_config)),
+      timeout)
+
+
+def create_pipeline_request_json(
+    resources_config, job_config, actions, timeout=model.SEVEN_DAYS):
+  """Create a pipelines API request serialized as a compact json string.
+
+  The whole request is serialized in a single pass; prefer this over calling
+  to_json() on each action when only the json payload is needed.
+  """
+  request = create_pipeline_request(
+      resources_config, job_config, actions, timeout=timeout)
+  return json.dumps(request, separators=(',', ':'))
+
+
+def write_pipeline_request(
+    fp, resources_config, job_config, actions, timeout=model.SEVEN_DAYS):
+  """Write a pipelines API request as compact json to a text file object.
+
+  The output is the same as create_pipeline_request_json(), but the request
+  is never materialized as a whole: each action and environment variable is
+  serialized and written as it is produced, which keeps peak memory close to
+  the size of a single item for jobs with many parameters.
+
+  >>> import io
+  >>> import pipeline_actions
+  >>> job = param_util.args_to_job_params(
+  ...     ['A=caf\u00e9', 'B'], ['gs://b/in.txt'], [], [], [])
+  >>> res = model.ResourcesConfig('project', 'us-west1')
+  >>> actions = [
+  ...     pipeline_actions.LocalizeAction(job),
+  ...     pipeline_actions.UserAction(job, 'run', 'debian', ['true']),
+  ...     pipeline_actions.DelocalizeAction(job),
+  ... ]
+  >>> fp = io.StringIO()
+  >>> write_pipeline_request(fp, res, job, actions)
+  >>> json.loads(fp.getvalue()) == create_pipeline_request(res, job, actions)
+  True
+  >>> fp.getvalue() == create_pipeline_request_json(res, job, actions)
+  True
+  """
+  for chunk in _iter_pipeline_request_json(
+      resources_config, job_config, actions, timeout):
+    fp.write(chunk)
+
+
+def _create_request(resources_config, actions, envs, timeout):
+  """Lay out a pipelines API request around its actions and environment."""
   return {
       'pipeline': {
-          'actions': [a.to_dict() for a in actions],
+          'actions': actions,
           'resources': _create_resources(resources_config),
           'environment': envs,
           'timeout': timeout,
       },
-      'labels': {
-          'minsub': 'v1',
-      },
+      'labels': dict(LABELS),
   }
 
 
+def _iter_pipeline_request_json(resources_config, job_config, actions, timeout):
+  """Yield the chunks of a compact json pipelines API request.
+
+  The request layout comes from _create_request(), serialized with
+  placeholders that are then replaced by the streamed actions and
+  environment.
+  """
+  dumps = json.JSONEncoder(separators=(',', ':')).encode
+  skeleton = dumps(_create_request(
+      resources_config, _ACTIONS_PLACEHOLDER, _ENVS_PLACEHOLDER, timeout))
+  for part in _PLACEHOLDER_RE.split(skeleton):
+    if part == _ENCODED_ACTIONS_PLACEHOLDER:
+      yield '['
+      for i, action in enumerate(_iter_active_actions(actions)):
+        if i:
+          yield ','
+        yield dumps(action.to_dict())
+      yield ']'
+    elif part == _ENCODED_ENVS_PLACEHOLDER:
+      yield '{'
+      for i, (name, value) in enumerate(_iter_envs(job_config)):
+        if i:
+          yield ','
+        yield dumps(name)
+        yield ':'
+        yield dumps(value)
+      yield '}'
+    else:
+      yield part
+
+
+def _iter_active_actions(actions):
+  """Yield the actions that have work to do."""
+  return (a for a in actions if not a.is_empty())
+
+
+def _iter_envs(job_config):
+  """Yield the (name, value) environment variables for each job parameter."""
+  for v in itertools.chain.from_iterable(job_config.values()):
+    if isinstance(v, param_util.FileParam):
+      yield v.name, model.DATA_DISK_MOUNT_PREFIX + v.docker_path
+    else:
+      yield v.name, v.value
+
+
 def _create_resources(rconfig):
   """Create the resources payload of the pipelines request."""
   vm = {